@@ -1,11 +1,18 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from functools import cached_property
+from typing import Literal, Optional
 import sys
 
 class Settings(BaseSettings):
     DATABASE_URL: str = "sqlite:////data/app.db"
     LOG_LEVEL: str = "INFO"
     WEBHOOK_SECRET: Optional[str] = None
+    SQLITE_SYNCHRONOUS: Literal["OFF", "NORMAL", "FULL", "EXTRA"] = "NORMAL"
+    
+    @cached_property
+    def WEBHOOK_SECRET_BYTES(self) -> bytes:
+        """Webhook secret encoded once for HMAC key setup"""
+        return self.WEBHOOK_SECRET.encode()
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,58 @@
+import asyncio
+from collections import deque
+from typing import Deque, Optional, Tuple
+from app.storage import insert_messages
+
+# Most rows committed together in one transaction
+BATCH_MAX_SIZE = 32
+
+class MessageBatcher:
+    """
+    Group-commits concurrent webhook inserts.
+    
+    A row that arrives while no commit is running starts one right away.
+    Only one commit runs at a time, in a worker thread so the fsync doesn't
+    block the event loop; rows that arrive meanwhile are queued and form
+    the next batch. Each caller awaits the (success, is_duplicate) result
+    for its own row.
+    """
+    
+    def __init__(self, max_size: int = BATCH_MAX_SIZE):
+        self.max_size = max_size
+        self._pending: Deque[Tuple[tuple, asyncio.Future]] = deque()
+        self._flush_task: Optional[asyncio.Task] = None
+    
+    async def submit(self, message_id: str, from_msisdn: str, to_msisdn: str,
+                     ts: str, text: Optional[str]) -> Tuple[bool, bool]:
+        """Queue a message for the next batch and wait for it to be committed"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append(((message_id, from_msisdn, to_msisdn, ts, text), future))
+        
+        # A running commit picks the row up when it finishes
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = loop.create_task(self.flush())
+        
+        return await future
+    
+    async def flush(self):
+        """Commit queued messages batch by batch until the queue is empty"""
+        while self._pending:
+            batch = [self._pending.popleft()
+                     for _ in range(min(len(self._pending), self.max_size))]
+            
+            try:
+                duplicates = await asyncio.to_thread(
+                    insert_messages, [row for row, _ in batch]
+                )
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            for (_, future), is_duplicate in zip(batch, duplicates):
+                if not future.done():
+                    future.set_result((True, is_duplicate))
+
+message_batcher = MessageBatcher()
@@ -1,17 +1,30 @@
-import json
 import logging
 import sys
 import time
-from datetime import datetime
 from contextvars import ContextVar
+import orjson
 import uuid
 
 request_id_var: ContextVar[str] = ContextVar('request_id', default='')
 
 class JSONFormatter(logging.Formatter):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Most records share a second with the previous one, so reuse its prefix
+        self._cached_second = None
+        self._cached_prefix = ''
+    
+    def format_ts(self, record) -> str:
+        """ISO-8601 UTC timestamp with millisecond precision from record.created"""
+        second = int(record.created)
+        if second != self._cached_second:
+            self._cached_prefix = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(second))
+            self._cached_second = second
+        return f"{self._cached_prefix}.{int(record.msecs):03d}Z"
+    
     def format(self, record):
         log_data = {
-            "ts": datetime.utcnow().isoformat() + 'Z',
+            "ts": self.format_ts(record),
             "level": record.levelname,
             "message": record.getMessage(),
         }
@@ -26,7 +39,11 @@ class JSONFormatter(logging.Formatter):
             if hasattr(record, key):
                 log_data[key] = getattr(record, key)
         
-        return json.dumps(log_data)
+        # Latency is recorded unrounded; round only when a record is emitted
+        if "latency_ms" in log_data:
+            log_data["latency_ms"] = round(log_data["latency_ms"], 2)
+        
+        return orjson.dumps(log_data).decode()
 
 def setup_logging(log_level: str = "INFO"):
     """Setup JSON logging"""
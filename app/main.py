@@ -1,17 +1,21 @@
 from fastapi import FastAPI, Request, HTTPException, Query
-from fastapi.responses import Response, JSONResponse
+from fastapi.responses import Response, JSONResponse, ORJSONResponse
+import orjson
+import base64
 import hmac
 import hashlib
+import os
 import time
-import uuid
 from typing import Optional
+from pydantic import TypeAdapter
 
 from app.config import settings
 from app.models import WebhookMessage, MessagesListResponse, MessageResponse, StatsResponse
-from app.storage import init_db, check_db_ready, insert_message, get_messages, get_stats
+from app.storage import init_db, check_db_ready, get_messages, get_stats
+from app.ingest import message_batcher
 from app.logging_utils import setup_logging, get_logger, request_id_var
 from app.metrics import (
-    http_requests_total, webhook_requests_total, 
+    http_requests_total, webhook_requests_total, counter_batcher,
     request_latency_ms, get_metrics, CONTENT_TYPE_LATEST
 )
 
@@ -20,7 +24,7 @@ setup_logging(settings.LOG_LEVEL)
 logger = get_logger()
 
 # Initialize FastAPI app
-app = FastAPI(title="Lyftr Webhook API")
+app = FastAPI(title="Lyftr Webhook API", default_response_class=ORJSONResponse)
 
 @app.on_event("startup")
 async def startup_event():
@@ -33,19 +37,19 @@ async def startup_event():
 async def log_requests(request: Request, call_next):
     """Middleware to log all requests and track metrics"""
     # Generate request ID
-    req_id = str(uuid.uuid4())
+    req_id = os.urandom(16).hex()
     request_id_var.set(req_id)
     
-    start_time = time.time()
+    start_ns = time.perf_counter_ns()
     
     # Process request
     response = await call_next(request)
     
     # Calculate latency
-    latency_ms = (time.time() - start_time) * 1000
+    latency_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
     
     # Track metrics
-    http_requests_total.labels(path=request.url.path, status=response.status_code).inc()
+    counter_batcher.inc(http_requests_total, request.url.path, response.status_code)
     request_latency_ms.observe(latency_ms)
     
     # Log request
@@ -54,7 +58,7 @@ async def log_requests(request: Request, call_next):
         'method': request.method,
         'path': request.url.path,
         'status': response.status_code,
-        'latency_ms': round(latency_ms, 2)
+        'latency_ms': latency_ms  # rounded by JSONFormatter
     }
     
     # Add webhook-specific fields if available
@@ -69,40 +73,60 @@ async def log_requests(request: Request, call_next):
     
     return response
 
-def verify_signature(body: bytes, signature: str) -> bool:
-    """Verify HMAC-SHA256 signature"""
-    expected = hmac.new(
-        settings.WEBHOOK_SECRET.encode(),
-        body,
-        hashlib.sha256
-    ).hexdigest()
-    return hmac.compare_digest(expected, signature)
+def decode_signature(signature: str) -> Optional[bytes]:
+    """Decode the X-Signature header (hex, or base64 as a fallback) to raw bytes"""
+    try:
+        return bytes.fromhex(signature)
+    except ValueError:
+        pass
+    try:
+        return base64.b64decode(signature, validate=True)
+    except ValueError:
+        # binascii.Error for bad base64, plain ValueError for non-ASCII input
+        return None
+
+# Keyed once at import; copy() per request skips re-deriving the HMAC pads
+_hmac_template = hmac.new(settings.WEBHOOK_SECRET_BYTES, digestmod=hashlib.sha256)
+
+# Bound validator resolved once instead of per-request attribute lookups
+_validate_webhook = TypeAdapter(WebhookMessage).validate_python
+
+def verify_signature(digest: bytes, signature: str) -> bool:
+    """Verify an HMAC-SHA256 digest against the X-Signature header"""
+    sig_bytes = decode_signature(signature)
+    if sig_bytes is None:
+        return False
+    return hmac.compare_digest(digest, sig_bytes)
 
 @app.post("/webhook")
 async def webhook(request: Request):
     """Receive webhook messages with HMAC signature validation"""
-    # Get raw body
-    body = await request.body()
+    # Stream the raw body, feeding each chunk to the HMAC as it arrives
+    mac = _hmac_template.copy()
+    body = bytearray()
+    async for chunk in request.stream():
+        mac.update(chunk)
+        body.extend(chunk)
     
     # Check signature
     signature = request.headers.get('X-Signature', '')
-    if not verify_signature(body, signature):
+    if not verify_signature(mac.digest(), signature):
         request.state.result = "invalid_signature"
-        webhook_requests_total.labels(result="invalid_signature").inc()
+        counter_batcher.inc(webhook_requests_total, "invalid_signature")
         logger.error("Invalid signature", extra={'result': 'invalid_signature'})
         raise HTTPException(status_code=401, detail="invalid signature")
     
     # Parse and validate message
     try:
-        message = WebhookMessage.model_validate_json(body)
+        message = _validate_webhook(orjson.loads(body))
     except Exception as e:
         request.state.result = "validation_error"
-        webhook_requests_total.labels(result="validation_error").inc()
+        counter_batcher.inc(webhook_requests_total, "validation_error")
         logger.error(f"Validation error: {e}", extra={'result': 'validation_error'})
         raise HTTPException(status_code=422, detail=str(e))
     
-    # Insert into database
-    success, is_duplicate = insert_message(
+    # Insert into database (batched with concurrent webhooks)
+    success, is_duplicate = await message_batcher.submit(
         message.message_id,
         message.from_,
         message.to,
@@ -116,14 +140,17 @@ async def webhook(request: Request):
     
     if is_duplicate:
         request.state.result = "duplicate"
-        webhook_requests_total.labels(result="duplicate").inc()
+        counter_batcher.inc(webhook_requests_total, "duplicate")
     else:
         request.state.result = "created"
-        webhook_requests_total.labels(result="created").inc()
+        counter_batcher.inc(webhook_requests_total, "created")
     
     return {"status": "ok"}
 
-@app.get("/messages", response_model=MessagesListResponse)
+# Rows come straight from SQL, so the list and stats endpoints return
+# ORJSONResponse directly instead of re-validating through response_model.
+# The models are still referenced for the OpenAPI schema.
+@app.get("/messages", response_model=None, responses={200: {"model": MessagesListResponse}})
 async def list_messages(
     limit: int = Query(default=50, ge=1, le=100),
     offset: int = Query(default=0, ge=0),
@@ -140,17 +167,17 @@ async def list_messages(
         q=q
     )
     
-    return {
+    return ORJSONResponse({
         "data": messages,
         "total": total,
         "limit": limit,
         "offset": offset
-    }
+    })
 
-@app.get("/stats", response_model=StatsResponse)
+@app.get("/stats", response_model=None, responses={200: {"model": StatsResponse}})
 async def get_message_stats():
     """Get message statistics"""
-    return get_stats()
+    return ORJSONResponse(get_stats())
 
 @app.get("/health/live")
 async def liveness():
@@ -1,5 +1,15 @@
 from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
 from prometheus_client import REGISTRY
+import threading
+import time
+
+# Pending counter increments are applied once this many have accumulated...
+COUNTER_FLUSH_SIZE = 256
+# ...or once this many seconds have passed since the last flush
+COUNTER_FLUSH_INTERVAL = 0.1
+
+# Rendered /metrics output is reused for this many seconds
+METRICS_CACHE_TTL = 1.0
 
 # HTTP requests counter
 http_requests_total = Counter(
@@ -19,11 +29,56 @@ webhook_requests_total = Counter(
 request_latency_ms = Histogram(
     'request_latency_ms',
     'Request latency in milliseconds',
-    buckets=[100, 500, 1000, 5000, 10000]
+    buckets=[0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000]
 )
 
-def get_metrics():
-    """Get Prometheus metrics in text format"""
-    return generate_latest(REGISTRY)
+class CounterBatcher:
+    """
+    Accumulates labelled counter increments and applies them as one inc(n)
+    per label set, instead of a labels().inc() (and its locks) per event.
+    """
+    
+    def __init__(self, flush_size: int = COUNTER_FLUSH_SIZE,
+                 flush_interval: float = COUNTER_FLUSH_INTERVAL):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._pending = {}
+        self._count = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def inc(self, counter: Counter, *labelvalues):
+        """Record one increment of counter for the given label values"""
+        key = (counter, labelvalues)
+        with self._lock:
+            self._pending[key] = self._pending.get(key, 0) + 1
+            self._count += 1
+            due = (self._count >= self.flush_size
+                   or time.monotonic() - self._last_flush >= self.flush_interval)
+        if due:
+            self.flush()
+    
+    def flush(self):
+        """Apply all pending increments to their counters"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._count = 0
+            self._last_flush = time.monotonic()
+        for (counter, labelvalues), amount in pending.items():
+            counter.labels(*labelvalues).inc(amount)
+
+counter_batcher = CounterBatcher()
+
+_metrics_cache = {"value": b"", "expires": 0.0}
+
+def get_metrics() -> bytes:
+    """Get Prometheus metrics in text format, re-rendered at most once per TTL"""
+    now = time.monotonic()
+    if now >= _metrics_cache["expires"]:
+        # A fresh render sees every increment recorded so far
+        counter_batcher.flush()
+        _metrics_cache["value"] = generate_latest(REGISTRY)
+        _metrics_cache["expires"] = now + METRICS_CACHE_TTL
+    return _metrics_cache["value"]
 
 
@@ -1,9 +1,34 @@
+import itertools
 import sqlite3
+import threading
+import time
 from datetime import datetime
 from typing import Optional, List, Tuple
 from contextlib import contextmanager
 from app.config import settings
 
+# Per-connection tuning applied when a thread opens its connection
+CONNECTION_PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-65536",
+]
+
+# Trigram tokenizer needs at least 3 characters to use the index
+FTS_MIN_QUERY_LENGTH = 3
+
+# /stats results are reused for up to this many seconds, or until the next insert
+STATS_CACHE_TTL = 1.0
+
+_local = threading.local()
+_stats_cache = {"value": None, "expires": 0.0, "generation": -1}
+# Bumped after every committed insert; a cached /stats result is only
+# valid for the generation it was computed under
+_stats_generation = 0
+_stats_lock = threading.Lock()
+
 def get_db_path() -> str:
     """Extract file path from DATABASE_URL"""
     url = settings.DATABASE_URL
@@ -11,19 +36,31 @@ def get_db_path() -> str:
         return url.replace("sqlite:///", "")
     return "/data/app.db"
 
+def get_connection() -> sqlite3.Connection:
+    """Return this thread's persistent connection, opening it on first use"""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(get_db_path(), check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        _local.conn = conn
+    return conn
+
 @contextmanager
 def get_db_connection():
-    """Context manager for database connections"""
-    conn = sqlite3.connect(get_db_path())
-    conn.row_factory = sqlite3.Row
+    """Context manager scoping a transaction on the thread's connection"""
+    conn = get_connection()
     try:
         yield conn
         conn.commit()
     except Exception:
         conn.rollback()
         raise
-    finally:
-        conn.close()
+
+def fts_phrase(q: str) -> str:
+    """Quote a search string as a single FTS5 phrase (substring match)"""
+    return '"' + q.replace('"', '""') + '"'
 
 def init_db():
     """Initialize the database schema"""
@@ -38,9 +75,39 @@ def init_db():
                 created_at TEXT NOT NULL
             )
         """)
-        # Create indexes for filtering
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_from_msisdn ON messages(from_msisdn)")
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_ts ON messages(ts)")
+        # Create indexes for filtering. Both end in the (ts, message_id) sort
+        # key, so filtered and unfiltered pages come back in order without a sort.
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_from_ts ON messages(from_msisdn, ts, message_id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_ts_message_id ON messages(ts, message_id)")
+        # Superseded by the composite indexes above
+        conn.execute("DROP INDEX IF EXISTS idx_from_msisdn")
+        conn.execute("DROP INDEX IF EXISTS idx_ts")
+        
+        # Trigram full-text index over text, kept in sync by triggers.
+        # Trigrams give the same case-insensitive substring semantics as LIKE.
+        # Entries are keyed on message_id rather than messages' implicit rowid,
+        # which VACUUM may renumber on a table without an INTEGER PRIMARY KEY.
+        fts_exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'messages_fts'"
+        ).fetchone()
+        conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+                message_id UNINDEXED, text, tokenize='trigram'
+            )
+        """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN
+                INSERT INTO messages_fts (message_id, text) VALUES (new.message_id, new.text);
+            END
+        """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN
+                DELETE FROM messages_fts WHERE message_id = old.message_id;
+            END
+        """)
+        if not fts_exists:
+            # Index rows written before the FTS table existed
+            conn.execute("INSERT INTO messages_fts (message_id, text) SELECT message_id, text FROM messages")
 
 def check_db_ready() -> bool:
     """Check if database is accessible"""
@@ -51,23 +118,75 @@ def check_db_ready() -> bool:
     except Exception:
         return False
 
-def insert_message(message_id: str, from_msisdn: str, to_msisdn: str, 
-                  ts: str, text: Optional[str]) -> Tuple[bool, bool]:
+def insert_messages(rows: List[Tuple[str, str, str, str, Optional[str]]]) -> List[bool]:
     """
-    Insert a message into the database.
-    Returns (success, is_duplicate)
+    Insert a batch of (message_id, from, to, ts, text) rows in one transaction.
+    Returns an is_duplicate flag per row, in input order.
     """
-    try:
-        with get_db_connection() as conn:
-            created_at = datetime.utcnow().isoformat() + 'Z'
-            conn.execute("""
+    created_at = datetime.utcnow().isoformat() + 'Z'
+    duplicates = []
+    with get_db_connection() as conn:
+        # Take the write lock up front so the batch can't fail mid-way on
+        # a lock upgrade; the whole batch shares one commit (one WAL sync)
+        conn.execute("BEGIN IMMEDIATE")
+        for row in rows:
+            # RETURNING yields no row when message_id already exists
+            inserted = conn.execute("""
                 INSERT INTO messages (message_id, from_msisdn, to_msisdn, ts, text, created_at)
                 VALUES (?, ?, ?, ?, ?, ?)
-            """, (message_id, from_msisdn, to_msisdn, ts, text, created_at))
-            return True, False
-    except sqlite3.IntegrityError:
-        # Duplicate message_id
-        return True, True
+                ON CONFLICT(message_id) DO NOTHING
+                RETURNING message_id
+            """, (*row, created_at)).fetchone()
+            duplicates.append(inserted is None)
+    if not all(duplicates):
+        invalidate_stats()
+    return duplicates
+
+def invalidate_stats():
+    """Mark any cached /stats result as stale"""
+    global _stats_generation
+    with _stats_lock:
+        _stats_generation += 1
+
+def build_messages_sql(has_from: bool, has_since: bool, q_mode: Optional[str]) -> Tuple[str, str]:
+    """
+    Build the (page, count) queries for one combination of filters.
+    q_mode is "fts", "like" or None.
+    """
+    where_clauses = []
+    
+    if has_from:
+        where_clauses.append("from_msisdn = ?")
+    
+    if has_since:
+        where_clauses.append("ts >= ?")
+    
+    if q_mode == "fts":
+        where_clauses.append(
+            "message_id IN (SELECT message_id FROM messages_fts WHERE messages_fts MATCH ?)"
+        )
+    elif q_mode == "like":
+        # Too short to form a trigram, fall back to a scan
+        where_clauses.append("text LIKE ?")
+    
+    where_sql = " AND ".join(where_clauses) if where_clauses else "1=1"
+    
+    page_sql = f"""
+        SELECT message_id, from_msisdn as 'from', to_msisdn as 'to', ts, text
+        FROM messages
+        WHERE {where_sql}
+        ORDER BY ts ASC, message_id ASC
+        LIMIT ? OFFSET ?
+    """
+    count_sql = f"SELECT COUNT(*) as total FROM messages WHERE {where_sql}"
+    return page_sql, count_sql
+
+# Every filter combination, built once so each request reuses the same SQL
+# text and hits sqlite3's per-connection prepared statement cache
+MESSAGES_SQL = {
+    key: build_messages_sql(*key)
+    for key in itertools.product((False, True), (False, True), (None, "fts", "like"))
+}
 
 def get_messages(limit: int = 50, offset: int = 0, from_filter: Optional[str] = None,
                 since: Optional[str] = None, q: Optional[str] = None) -> Tuple[List[dict], int]:
@@ -75,67 +194,86 @@ def get_messages(limit: int = 50, offset: int = 0, from_filter: Optional[str] =
     Get messages with pagination and filters.
     Returns (messages, total_count)
     """
+    params = []
+    if from_filter:
+        params.append(from_filter)
+    if since:
+        params.append(since)
+    if q and len(q) >= FTS_MIN_QUERY_LENGTH:
+        q_mode = "fts"
+        params.append(fts_phrase(q))
+    elif q:
+        q_mode = "like"
+        params.append(f"%{q}%")
+    else:
+        q_mode = None
+    
+    page_sql, count_sql = MESSAGES_SQL[(bool(from_filter), bool(since), q_mode)]
+    
     with get_db_connection() as conn:
-        # Build WHERE clause
-        where_clauses = []
-        params = []
-        
-        if from_filter:
-            where_clauses.append("from_msisdn = ?")
-            params.append(from_filter)
-        
-        if since:
-            where_clauses.append("ts >= ?")
-            params.append(since)
+        # The count stays a separate query: it can be answered from an index
+        # alone, while the page query stops reading rows once LIMIT is met
+        total = conn.execute(count_sql, params).fetchone()['total']
+        rows = conn.execute(page_sql, [*params, limit, offset]).fetchall()
         
-        if q:
-            where_clauses.append("text LIKE ?")
-            params.append(f"%{q}%")
-        
-        where_sql = " AND ".join(where_clauses) if where_clauses else "1=1"
-        
-        # Get total count
-        count_query = f"SELECT COUNT(*) as total FROM messages WHERE {where_sql}"
-        total = conn.execute(count_query, params).fetchone()['total']
-        
-        # Get messages
-        query = f"""
-            SELECT message_id, from_msisdn as 'from', to_msisdn as 'to', ts, text
-            FROM messages
-            WHERE {where_sql}
-            ORDER BY ts ASC, message_id ASC
-            LIMIT ? OFFSET ?
-        """
-        params.extend([limit, offset])
-        
-        rows = conn.execute(query, params).fetchall()
-        messages = [dict(row) for row in rows]
+        messages = [
+            {
+                "message_id": row['message_id'],
+                "from": row['from'],
+                "to": row['to'],
+                "ts": row['ts'],
+                "text": row['text']
+            }
+            for row in rows
+        ]
         
         return messages, total
 
 def get_stats() -> dict:
-    """Get message statistics"""
+    """Get message statistics, served from cache while fresh"""
+    now = time.monotonic()
+    with _stats_lock:
+        generation = _stats_generation
+        if now < _stats_cache["expires"] and _stats_cache["generation"] == generation:
+            return _stats_cache["value"]
+    
+    stats = compute_stats()
+    with _stats_lock:
+        # An insert that landed while computing may be missing from stats,
+        # so only cache it if no insert committed in the meantime
+        if _stats_generation == generation:
+            _stats_cache.update(value=stats, expires=now + STATS_CACHE_TTL, generation=generation)
+    return stats
+
+def compute_stats() -> dict:
+    """Compute message statistics from the database"""
     with get_db_connection() as conn:
-        # Total messages
-        total = conn.execute("SELECT COUNT(*) as cnt FROM messages").fetchone()['cnt']
-        
-        # Unique senders count
-        senders = conn.execute("SELECT COUNT(DISTINCT from_msisdn) as cnt FROM messages").fetchone()['cnt']
-        
-        # Messages per sender (top 10)
+        # Totals, unique senders and top 10 senders from one pass over
+        # idx_from_ts: the per-sender groups are built once and the window
+        # sums run over them before the top 10 are cut
         per_sender = conn.execute("""
-            SELECT from_msisdn as 'from', COUNT(*) as count
-            FROM messages
-            GROUP BY from_msisdn
+            SELECT from_msisdn as 'from', count,
+                   SUM(count) OVER () as total,
+                   COUNT(*) OVER () as senders
+            FROM (
+                SELECT from_msisdn, COUNT(*) as count
+                FROM messages
+                GROUP BY from_msisdn
+            )
             ORDER BY count DESC
             LIMIT 10
         """).fetchall()
         
+        total = per_sender[0]['total'] if per_sender else 0
+        senders = per_sender[0]['senders'] if per_sender else 0
         messages_per_sender = [{"from": row['from'], "count": row['count']} for row in per_sender]
         
-        # First and last message timestamps
-        first = conn.execute("SELECT MIN(ts) as ts FROM messages").fetchone()['ts']
-        last = conn.execute("SELECT MAX(ts) as ts FROM messages").fetchone()['ts']
+        # First and last message timestamps (two index seeks, one round trip)
+        bounds = conn.execute("""
+            SELECT (SELECT ts FROM messages ORDER BY ts ASC LIMIT 1) as first,
+                   (SELECT ts FROM messages ORDER BY ts DESC LIMIT 1) as last
+        """).fetchone()
+        first, last = bounds['first'], bounds['last']
         
         return {
             "total_messages": total,
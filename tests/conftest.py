@@ -8,9 +8,11 @@ import os
 os.environ.setdefault("WEBHOOK_SECRET", "testsecret")
 os.environ.setdefault("DATABASE_URL", "sqlite:///./test_app.db")
 os.environ.setdefault("LOG_LEVEL", "INFO")
+# The test database is throwaway, so skip fsyncs entirely
+os.environ.setdefault("SQLITE_SYNCHRONOUS", "OFF")
 
 # Import after setting env vars
-from app.storage import init_db
+from app.storage import init_db, insert_messages, get_db_connection
 from fastapi.testclient import TestClient
 from app.main import app
 
@@ -22,10 +24,60 @@ def setup_test_database():
     yield
     # Cleanup after all tests (optional)
     import os
-    if os.path.exists("./test_app.db"):
-        os.remove("./test_app.db")
+    for path in ("./test_app.db", "./test_app.db-wal", "./test_app.db-shm"):
+        if os.path.exists(path):
+            os.remove(path)
 
-@pytest.fixture(scope="module")
+# Messages the listing and stats tests rely on
+TEST_MESSAGES = [
+    {
+        "message_id": "pytest_msg_1",
+        "from": "+919876543210",
+        "to": "+14155550100",
+        "ts": "2025-01-15T09:00:00Z",
+        "text": "First pytest message"
+    },
+    {
+        "message_id": "pytest_msg_2",
+        "from": "+919876543210",
+        "to": "+14155550100",
+        "ts": "2025-01-15T10:00:00Z",
+        "text": "Second pytest message with Hello"
+    },
+    {
+        "message_id": "pytest_msg_3",
+        "from": "+911234567890",
+        "to": "+14155550100",
+        "ts": "2025-01-15T11:00:00Z",
+        "text": "Different sender message"
+    }
+]
+
+@pytest.fixture(scope="session", autouse=True)
+def seed_db(setup_test_database):
+    """Insert the test messages once, straight through the storage layer"""
+    # A reused database (e.g. after an interrupted run) may already have them
+    seed_ids = [msg["message_id"] for msg in TEST_MESSAGES]
+    placeholders = ", ".join("?" for _ in seed_ids)
+    with get_db_connection() as conn:
+        existing = conn.execute(
+            f"SELECT COUNT(*) as cnt FROM messages WHERE message_id IN ({placeholders})",
+            seed_ids
+        ).fetchone()['cnt']
+    if existing == len(seed_ids):
+        return
+    
+    # The webhook path (signature, validation) is covered by test_webhook.py.
+    # One batch means one transaction and one commit for all rows.
+    insert_messages([
+        (msg["message_id"], msg["from"], msg["to"], msg["ts"], msg["text"])
+        for msg in TEST_MESSAGES
+    ])
+
+@pytest.fixture(scope="session")
 def client():
-    """Create a test client"""
-    return TestClient(app)
\ No newline at end of file
+    """Create a test client shared by the whole session"""
+    # Entering the client runs app startup once and keeps one event loop
+    # alive for every request, instead of building a loop per call
+    with TestClient(app) as c:
+        yield c
\ No newline at end of file
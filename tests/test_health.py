@@ -1,10 +1,6 @@
 import pytest
-from fastapi.testclient import TestClient
-from app.main import app
 
-client = TestClient(app)
-
-def test_health_live():
+def test_health_live(client):
     """Test liveness probe always returns 200"""
     response = client.get("/health/live")
     assert response.status_code == 200
@@ -13,7 +9,7 @@ def test_health_live():
     assert "status" in data
     assert data["status"] == "ok"
 
-def test_health_ready():
+def test_health_ready(client):
     """Test readiness probe returns 200 when ready"""
     response = client.get("/health/ready")
     assert response.status_code == 200
@@ -22,7 +18,7 @@ def test_health_ready():
     assert "status" in data
     assert data["status"] == "ready"
 
-def test_metrics_endpoint():
+def test_metrics_endpoint(client):
     """Test metrics endpoint returns Prometheus format"""
     response = client.get("/metrics")
     assert response.status_code == 200
@@ -38,7 +34,7 @@ def test_metrics_endpoint():
     # Check for common Prometheus metric patterns
     assert "# HELP" in text or "# TYPE" in text or "_total" in text
 
-def test_metrics_http_requests():
+def test_metrics_http_requests(client):
     """Test that http_requests_total metric exists"""
     response = client.get("/metrics")
     assert response.status_code == 200
@@ -47,7 +43,7 @@ def test_metrics_http_requests():
     # Should have http_requests_total with labels
     assert "http_requests_total{" in text or "http_requests_total " in text
 
-def test_metrics_webhook_requests():
+def test_metrics_webhook_requests(client):
     """Test that webhook_requests_total metric exists"""
     response = client.get("/metrics")
     assert response.status_code == 200
@@ -56,7 +52,7 @@ def test_metrics_webhook_requests():
     # Should have webhook_requests_total with result labels
     assert "webhook_requests_total{" in text or "webhook_requests_total " in text
 
-def test_metrics_request_latency():
+def test_metrics_request_latency(client):
     """Test that request latency metrics exist"""
     response = client.get("/metrics")
     assert response.status_code == 200
@@ -1,67 +1,4 @@
-import pytest
-from fastapi.testclient import TestClient
-from app.main import app
-import hmac
-import hashlib
-import json
-from app.config import settings
-
-client = TestClient(app)
-
-def generate_signature(body_dict):
-    """Generate HMAC signature for webhook"""
-    body_str = json.dumps(body_dict, separators=(',', ':'))
-    signature = hmac.new(
-        settings.WEBHOOK_SECRET.encode(),
-        body_str.encode(),
-        hashlib.sha256
-    ).hexdigest()
-    return signature, body_str
-
-@pytest.fixture(scope="module", autouse=True)
-def setup_test_messages():
-    """Setup test messages before running tests"""
-    test_messages = [
-        {
-            "message_id": "pytest_msg_1",
-            "from": "+919876543210",
-            "to": "+14155550100",
-            "ts": "2025-01-15T09:00:00Z",
-            "text": "First pytest message"
-        },
-        {
-            "message_id": "pytest_msg_2",
-            "from": "+919876543210",
-            "to": "+14155550100",
-            "ts": "2025-01-15T10:00:00Z",
-            "text": "Second pytest message with Hello"
-        },
-        {
-            "message_id": "pytest_msg_3",
-            "from": "+911234567890",
-            "to": "+14155550100",
-            "ts": "2025-01-15T11:00:00Z",
-            "text": "Different sender message"
-        }
-    ]
-    
-    # Insert test messages
-    for msg in test_messages:
-        signature, body = generate_signature(msg)
-        client.post(
-            "/webhook",
-            headers={
-                "Content-Type": "application/json",
-                "X-Signature": signature
-            },
-            data=body
-        )
-    
-    yield  # Tests run here
-    
-    # Cleanup is not needed as we're using SQLite and tests are isolated
-
-def test_messages_list_structure():
+def test_messages_list_structure(client):
     """Test basic message listing returns correct structure"""
     response = client.get("/messages")
     assert response.status_code == 200
@@ -76,7 +13,7 @@ def test_messages_list_structure():
     assert isinstance(data["limit"], int)
     assert isinstance(data["offset"], int)
 
-def test_messages_default_pagination():
+def test_messages_default_pagination(client):
     """Test default pagination values"""
     response = client.get("/messages")
     assert response.status_code == 200
@@ -85,7 +22,7 @@ def test_messages_default_pagination():
     assert data["limit"] == 50  # Default limit
     assert data["offset"] == 0  # Default offset
 
-def test_messages_custom_pagination():
+def test_messages_custom_pagination(client):
     """Test custom pagination parameters"""
     response = client.get("/messages?limit=2&offset=1")
     assert response.status_code == 200
@@ -95,7 +32,7 @@ def test_messages_custom_pagination():
     assert data["offset"] == 1
     assert len(data["data"]) <= 2
 
-def test_messages_pagination_limits():
+def test_messages_pagination_limits(client):
     """Test pagination limit constraints"""
     # Test max limit (100)
     response = client.get("/messages?limit=150")
@@ -109,54 +46,74 @@ def test_messages_pagination_limits():
     response = client.get("/messages?limit=100")
     assert response.status_code == 200
 
-def test_messages_filter_by_from():
+def test_messages_filter_by_from(client):
     """Test filtering by sender (from parameter)"""
-    response = client.get("/messages?from=+919876543210")
+    # Passed as params so the leading + is encoded, not read as a space
+    response = client.get("/messages", params={"from": "+919876543210"})
     assert response.status_code == 200
     
     data = response.json()
-    # All returned messages should be from the specified sender
-    for msg in data["data"]:
-        assert msg["from"] == "+919876543210"
+    ids = {msg["message_id"] for msg in data["data"]}
+    # Both seed messages from this sender, and nothing from the other one
+    assert {"pytest_msg_1", "pytest_msg_2"} <= ids
+    assert "pytest_msg_3" not in ids
+    assert {msg["from"] for msg in data["data"]} == {"+919876543210"}
 
-def test_messages_filter_by_since():
+def test_messages_filter_by_since(client):
     """Test filtering by timestamp (since parameter)"""
     response = client.get("/messages?since=2025-01-15T10:00:00Z")
     assert response.status_code == 200
     
     data = response.json()
+    ids = {msg["message_id"] for msg in data["data"]}
+    assert {"pytest_msg_2", "pytest_msg_3"} <= ids
+    assert "pytest_msg_1" not in ids
     # All messages should be >= the since timestamp
-    for msg in data["data"]:
-        assert msg["ts"] >= "2025-01-15T10:00:00Z"
+    assert all(msg["ts"] >= "2025-01-15T10:00:00Z" for msg in data["data"])
 
-def test_messages_text_search():
+def test_messages_text_search(client):
     """Test text search (q parameter)"""
     response = client.get("/messages?q=Hello")
     assert response.status_code == 200
     
     data = response.json()
+    assert "pytest_msg_2" in {msg["message_id"] for msg in data["data"]}
     # All returned messages should contain the search term (case-insensitive)
-    for msg in data["data"]:
-        if msg["text"]:
-            assert "hello" in msg["text"].lower()
+    assert all("hello" in msg["text"].lower() for msg in data["data"] if msg["text"])
 
-def test_messages_ordering():
+def test_messages_text_search_inside_word(client):
+    """Test search matches a substring inside a word, ignoring case"""
+    response = client.get("/messages?q=ELLO")
+    assert response.status_code == 200
+    
+    data = response.json()
+    assert "pytest_msg_2" in {msg["message_id"] for msg in data["data"]}
+    assert all("ello" in msg["text"].lower() for msg in data["data"])
+
+def test_messages_text_search_short_query(client):
+    """Test queries too short for the trigram index still match (LIKE fallback)"""
+    response = client.get("/messages?q=He")
+    assert response.status_code == 200
+    
+    data = response.json()
+    assert "pytest_msg_2" in {msg["message_id"] for msg in data["data"]}
+    assert all("he" in msg["text"].lower() for msg in data["data"])
+
+def test_messages_ordering(client):
     """Test messages are ordered by ts ASC, message_id ASC"""
-    response = client.get("/messages?from=+919876543210")
+    response = client.get("/messages", params={"from": "+919876543210"})
     assert response.status_code == 200
     
     data = response.json()
     messages = data["data"]
+    assert len(messages) >= 2
     
     # Check ordering (should be ascending by ts, then message_id)
-    if len(messages) > 1:
-        for i in range(len(messages) - 1):
-            current = messages[i]
-            next_msg = messages[i + 1]
-            # Should be ordered by ts, then message_id
-            assert (current["ts"], current["message_id"]) <= (next_msg["ts"], next_msg["message_id"])
+    keys = [(msg["ts"], msg["message_id"]) for msg in messages]
+    assert keys == sorted(keys)
+    assert keys[0] == ("2025-01-15T09:00:00Z", "pytest_msg_1")
 
-def test_messages_total_count():
+def test_messages_total_count(client):
     """Test that total reflects total matching records, not just returned data"""
     # Get with low limit
     response = client.get("/messages?limit=1")
@@ -170,20 +127,37 @@ def test_messages_total_count():
     if data["total"] > 1:
         assert len(data["data"]) == 1
 
-def test_messages_combined_filters():
+def test_messages_total_past_last_page(client):
+    """Test that total is still reported when offset is past the last row"""
+    total = client.get("/messages").json()["total"]
+    
+    response = client.get(f"/messages?offset={total + 10}")
+    assert response.status_code == 200
+    
+    data = response.json()
+    assert data["data"] == []
+    assert data["total"] == total
+
+def test_messages_combined_filters(client):
     """Test combining multiple filters"""
-    response = client.get("/messages?from=+919876543210&since=2025-01-15T09:30:00Z&limit=5")
+    response = client.get("/messages", params={
+        "from": "+919876543210",
+        "since": "2025-01-15T09:30:00Z",
+        "limit": 5
+    })
     assert response.status_code == 200
     
     data = response.json()
-    # Check all filters are applied
-    for msg in data["data"]:
-        assert msg["from"] == "+919876543210"
-        assert msg["ts"] >= "2025-01-15T09:30:00Z"
+    ids = {msg["message_id"] for msg in data["data"]}
+    # Only the second seed message matches both sender and since
+    assert "pytest_msg_2" in ids
+    assert not ids & {"pytest_msg_1", "pytest_msg_3"}
+    assert {msg["from"] for msg in data["data"]} == {"+919876543210"}
+    assert all(msg["ts"] >= "2025-01-15T09:30:00Z" for msg in data["data"])
     
     assert len(data["data"]) <= 5
 
-def test_messages_response_format():
+def test_messages_response_format(client):
     """Test that each message has correct fields"""
     response = client.get("/messages?limit=1")
     assert response.status_code == 200
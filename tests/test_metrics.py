@@ -0,0 +1,74 @@
+from prometheus_client import CollectorRegistry, Counter
+import app.metrics as metrics
+from app.metrics import CounterBatcher, get_metrics
+
+def make_counter():
+    """A labelled counter in its own registry, away from the app's metrics"""
+    registry = CollectorRegistry()
+    counter = Counter('batched_events', 'Batched test events', ['kind'], registry=registry)
+    return counter, registry
+
+def counter_value(registry, kind):
+    """Current value of the test counter for one label (0 before any inc)"""
+    return registry.get_sample_value('batched_events_total', {'kind': kind}) or 0
+
+def test_counter_batcher_flushes_at_flush_size():
+    """Test pending increments are applied once flush_size is reached"""
+    counter, registry = make_counter()
+    batcher = CounterBatcher(flush_size=2, flush_interval=60)
+    
+    batcher.inc(counter, "a")
+    assert counter_value(registry, "a") == 0
+    
+    batcher.inc(counter, "a")
+    assert counter_value(registry, "a") == 2
+    
+    batcher.inc(counter, "a")
+    batcher.inc(counter, "b")
+    assert counter_value(registry, "a") == 3
+    assert counter_value(registry, "b") == 1
+
+def test_counter_batcher_flushes_after_interval():
+    """Test pending increments are applied once flush_interval has passed"""
+    counter, registry = make_counter()
+    batcher = CounterBatcher(flush_size=100, flush_interval=60)
+    
+    batcher.inc(counter, "a")
+    assert counter_value(registry, "a") == 0
+    
+    # Pretend the last flush was a full interval ago
+    batcher._last_flush -= 60
+    batcher.inc(counter, "a")
+    assert counter_value(registry, "a") == 2
+
+def test_get_metrics_flushes_pending_increments(monkeypatch):
+    """Test a fresh /metrics render applies increments still pending"""
+    counter, registry = make_counter()
+    batcher = CounterBatcher(flush_size=100, flush_interval=60)
+    monkeypatch.setattr(metrics, "counter_batcher", batcher)
+    monkeypatch.setattr(metrics, "_metrics_cache", {"value": b"", "expires": 0.0})
+    
+    batcher.inc(counter, "a")
+    assert counter_value(registry, "a") == 0
+    
+    get_metrics()
+    assert counter_value(registry, "a") == 1
+
+def test_get_metrics_cached_until_ttl_expires(monkeypatch):
+    """Test /metrics bytes are reused within the TTL and re-rendered after it"""
+    counter, registry = make_counter()
+    batcher = CounterBatcher(flush_size=100, flush_interval=60)
+    monkeypatch.setattr(metrics, "REGISTRY", registry)
+    monkeypatch.setattr(metrics, "counter_batcher", batcher)
+    monkeypatch.setattr(metrics, "_metrics_cache", {"value": b"", "expires": 0.0})
+    
+    batcher.inc(counter, "a")
+    first = get_metrics()
+    assert b'batched_events_total{kind="a"} 1.0' in first
+    
+    batcher.inc(counter, "a")
+    assert get_metrics() == first
+    
+    # Expire the cache; the next render flushes the pending increment first
+    monkeypatch.setitem(metrics._metrics_cache, "expires", 0.0)
+    assert b'batched_events_total{kind="a"} 2.0' in get_metrics()
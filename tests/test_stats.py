@@ -1,10 +1,6 @@
-import pytest
-from fastapi.testclient import TestClient
-from app.main import app
+from tests.signing import make_body, prep_request
 
-client = TestClient(app)
-
-def test_stats_endpoint_structure():
+def test_stats_endpoint_structure(client):
     """Test stats endpoint returns correct structure"""
     response = client.get("/stats")
     assert response.status_code == 200
@@ -16,7 +12,7 @@ def test_stats_endpoint_structure():
     assert "first_message_ts" in data
     assert "last_message_ts" in data
 
-def test_stats_total_messages():
+def test_stats_total_messages(client):
     """Test total messages count matches actual messages"""
     # Get all messages
     messages_response = client.get("/messages?limit=100")
@@ -30,7 +26,7 @@ def test_stats_total_messages():
     # Should match
     assert stats_data["total_messages"] == total_from_messages
 
-def test_stats_senders_count():
+def test_stats_senders_count(client):
     """Test unique senders count is valid"""
     response = client.get("/stats")
     assert response.status_code == 200
@@ -42,7 +38,7 @@ def test_stats_senders_count():
     # Senders count should be <= total messages
     assert data["senders_count"] <= data["total_messages"]
 
-def test_stats_messages_per_sender_format():
+def test_stats_messages_per_sender_format(client):
     """Test messages per sender list format"""
     response = client.get("/stats")
     assert response.status_code == 200
@@ -60,7 +56,7 @@ def test_stats_messages_per_sender_format():
         assert isinstance(sender["count"], int)
         assert sender["count"] > 0
 
-def test_stats_messages_per_sender_ordering():
+def test_stats_messages_per_sender_ordering(client):
     """Test messages per sender is sorted by count descending"""
     response = client.get("/stats")
     assert response.status_code == 200
@@ -73,7 +69,7 @@ def test_stats_messages_per_sender_ordering():
         for i in range(len(messages_per_sender) - 1):
             assert messages_per_sender[i]["count"] >= messages_per_sender[i + 1]["count"]
 
-def test_stats_messages_per_sender_limit():
+def test_stats_messages_per_sender_limit(client):
     """Test messages per sender is limited to top 10"""
     response = client.get("/stats")
     assert response.status_code == 200
@@ -84,7 +80,7 @@ def test_stats_messages_per_sender_limit():
     # Should have max 10 entries
     assert len(messages_per_sender) <= 10
 
-def test_stats_timestamps():
+def test_stats_timestamps(client):
     """Test first and last message timestamps"""
     response = client.get("/stats")
     assert response.status_code == 200
@@ -103,7 +99,7 @@ def test_stats_timestamps():
         assert data["first_message_ts"] is None
         assert data["last_message_ts"] is None
 
-def test_stats_consistency():
+def test_stats_consistency(client):
     """Test that stats data is internally consistent"""
     response = client.get("/stats")
     assert response.status_code == 200
@@ -120,3 +116,15 @@ def test_stats_consistency():
     total_from_senders = sum(sender["count"] for sender in data["messages_per_sender"])
     assert total_from_senders <= data["total_messages"]
 
+def test_stats_reflects_new_message(client):
+    """Test a message posted after /stats was cached shows up immediately"""
+    before = client.get("/stats").json()["total_messages"]
+    
+    body, headers = prep_request(make_body(
+        "pytest_stats_new", "+919876543210", "+14155550100", "2025-01-15T12:00:00Z",
+        "Counted by stats"
+    ))
+    response = client.post("/webhook", headers=headers, content=body)
+    assert response.status_code == 200
+    
+    assert client.get("/stats").json()["total_messages"] == before + 1
@@ -0,0 +1,118 @@
+import asyncio
+import sqlite3
+import app.ingest as ingest
+import app.storage as storage
+from app.ingest import MessageBatcher
+from app.storage import get_messages, get_stats, init_db, insert_messages
+
+def make_row(message_id):
+    """Build a valid (message_id, from, to, ts, text) row"""
+    return (message_id, "+919876543210", "+14155550100", "2025-01-15T12:00:00Z", "Storage test")
+
+def test_insert_messages_duplicate_within_batch():
+    """Test the second copy of a message_id in one batch is reported as duplicate"""
+    assert insert_messages([make_row("storage_same"), make_row("storage_same")]) == [False, True]
+
+def test_insert_messages_overlapping_existing_rows():
+    """Test rows already in the table are flagged, new rows are inserted"""
+    assert insert_messages([make_row("storage_existing")]) == [False]
+    
+    result = insert_messages([make_row("storage_existing"), make_row("storage_new")])
+    assert result == [True, False]
+
+def test_batcher_concurrent_submits_get_own_results():
+    """Test concurrent submits each resolve to their own row's result"""
+    batcher = MessageBatcher(max_size=2)
+    
+    async def run():
+        return await asyncio.gather(*[
+            batcher.submit(*make_row(message_id))
+            for message_id in ["batch_a", "batch_b", "batch_a", "batch_c", "batch_b"]
+        ])
+    
+    results = asyncio.run(run())
+    assert results == [(True, False), (True, False), (True, True), (True, False), (True, True)]
+
+def test_batcher_error_reaches_every_future(monkeypatch):
+    """Test a failed commit raises in every request of the batch"""
+    def failing_insert(rows):
+        raise RuntimeError("disk full")
+    
+    monkeypatch.setattr(ingest, "insert_messages", failing_insert)
+    batcher = MessageBatcher()
+    
+    async def run():
+        return await asyncio.gather(
+            *[batcher.submit(*make_row(f"batch_err_{i}")) for i in range(3)],
+            return_exceptions=True
+        )
+    
+    results = asyncio.run(run())
+    assert len(results) == 3
+    assert all(isinstance(r, RuntimeError) and str(r) == "disk full" for r in results)
+
+def use_database(monkeypatch, path):
+    """Point this thread's storage connection at a scratch database"""
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    monkeypatch.setattr(storage._local, "conn", conn)
+    return conn
+
+def create_pre_fts_messages(conn):
+    """Create the messages table as it was before full-text search, with one row"""
+    conn.execute("""
+        CREATE TABLE messages (
+            message_id TEXT PRIMARY KEY,
+            from_msisdn TEXT NOT NULL,
+            to_msisdn TEXT NOT NULL,
+            ts TEXT NOT NULL,
+            text TEXT,
+            created_at TEXT NOT NULL
+        )
+    """)
+    conn.execute(
+        "INSERT INTO messages VALUES (?, ?, ?, ?, ?, ?)",
+        (*make_row("legacy_row")[:4], "Written before the search index", "2025-01-15T12:00:00Z")
+    )
+    conn.commit()
+
+def search_ids(q):
+    """message_ids returned by a text search"""
+    messages, _ = get_messages(q=q)
+    return [msg["message_id"] for msg in messages]
+
+def test_init_db_indexes_existing_rows(monkeypatch, tmp_path):
+    """Test rows written before the FTS table existed become searchable"""
+    conn = use_database(monkeypatch, str(tmp_path / "legacy.db"))
+    create_pre_fts_messages(conn)
+    
+    init_db()
+    
+    assert search_ids("search index") == ["legacy_row"]
+
+def test_deleted_message_leaves_search_index(monkeypatch, tmp_path):
+    """Test deleting a message also removes it from the search index"""
+    conn = use_database(monkeypatch, str(tmp_path / "delete.db"))
+    init_db()
+    insert_messages([make_row("to_delete"), make_row("to_keep")])
+    
+    conn.execute("DELETE FROM messages WHERE message_id = 'to_delete'")
+    conn.commit()
+    
+    assert search_ids("Storage test") == ["to_keep"]
+    assert conn.execute("SELECT COUNT(*) FROM messages_fts").fetchone()[0] == 1
+
+def test_stats_not_cached_across_concurrent_insert(monkeypatch):
+    """Test stats computed while an insert commits are not served from cache"""
+    compute_stats = storage.compute_stats
+    
+    def compute_then_insert():
+        stats = compute_stats()
+        insert_messages([make_row("stats_race")])
+        return stats
+    
+    monkeypatch.setattr(storage, "compute_stats", compute_then_insert)
+    stale = get_stats()
+    monkeypatch.setattr(storage, "compute_stats", compute_stats)
+    
+    assert get_stats()["total_messages"] == stale["total_messages"] + 1
@@ -1,208 +1,118 @@
 import pytest
-from fastapi.testclient import TestClient
-import hmac
-import hashlib
-import json
-from app.main import app
-from app.config import settings
-
-client = TestClient(app)
-
-def generate_signature(body_dict):
-    """Generate HMAC signature for webhook"""
-    body_str = json.dumps(body_dict, separators=(',', ':'))
-    signature = hmac.new(
-        settings.WEBHOOK_SECRET.encode(),
-        body_str.encode(),
-        hashlib.sha256
-    ).hexdigest()
-    return signature, body_str
-
-def test_webhook_valid_insert():
+import base64
+from tests.signing import make_body, prep_request
+
+# Request bodies and headers are built once at import, not per test
+VALID_BODY, VALID_HEADERS = prep_request(make_body(
+    "pytest_test_1", "+919876543210", "+14155550100", "2025-01-15T10:00:00Z",
+    "Test message from pytest"
+))
+
+DUP_BODY, DUP_HEADERS = prep_request(make_body(
+    "pytest_dup_test", "+919876543210", "+14155550100", "2025-01-15T10:00:00Z",
+    "Duplicate test"
+))
+
+INVALID_SIG_BODY, INVALID_SIG_HEADERS = prep_request(make_body(
+    "pytest_invalid_sig", "+919876543210", "+14155550100", "2025-01-15T10:00:00Z",
+    "Invalid signature test"
+), signature="invalid_signature_12345")
+
+NON_ASCII_SIG_BODY, NON_ASCII_SIG_HEADERS = prep_request(make_body(
+    "pytest_non_ascii_sig", "+919876543210", "+14155550100", "2025-01-15T10:00:00Z",
+    "Non-ASCII signature test"
+), signature=b"\xe9\xe9")  # Sent as raw latin-1 bytes
+
+NO_SIG_BODY, NO_SIG_HEADERS = prep_request(make_body(
+    "pytest_no_sig", "+919876543210", "+14155550100", "2025-01-15T10:00:00Z",
+    "No signature"
+), signature=False)
+
+# Smallest payload that reaches each failing validator: just the bad field.
+# The expected message pins the 422 to that field, not the missing others.
+INVALID_FIELDS = [
+    ("from", "919876543210", "E.164"),                 # Missing + prefix
+    ("from", "+919876543210\n", "E.164"),              # Trailing newline
+    ("ts", "2025-01-15T10:00:00", "must end with Z"),  # Missing Z suffix
+    ("ts", "2025-01-15Z", "Invalid ISO-8601"),         # Date only, no time
+    ("message_id", "", "at least 1 character"),        # Empty message_id
+]
+# Each case signed once at import: (body, headers, expected error)
+INVALID_REQUESTS = [
+    pytest.param(*prep_request({field: value}), error, id=f"{field}={value!r}")
+    for field, value, error in INVALID_FIELDS
+]
+
+NO_TEXT_BODY, NO_TEXT_HEADERS = prep_request({
+    "message_id": "pytest_no_text",
+    "from": "+919876543210",
+    "to": "+14155550100",
+    "ts": "2025-01-15T10:00:00Z"
+    # No text field
+})
+
+B64_BODY, B64_HEADERS = prep_request(make_body(
+    "pytest_b64_sig", "+919876543210", "+14155550100", "2025-01-15T10:00:00Z",
+    "Base64 signature"
+))
+B64_HEADERS["X-Signature"] = base64.b64encode(bytes.fromhex(B64_HEADERS["X-Signature"])).decode()
+
+def test_webhook_valid_insert(client):
     """Test valid message insertion returns 200"""
-    message = {
-        "message_id": "pytest_test_1",
-        "from": "+919876543210",
-        "to": "+14155550100",
-        "ts": "2025-01-15T10:00:00Z",
-        "text": "Test message from pytest"
-    }
-    signature, body = generate_signature(message)
-    
-    response = client.post(
-        "/webhook",
-        headers={
-            "Content-Type": "application/json",
-            "X-Signature": signature
-        },
-        data=body
-    )
+    response = client.post("/webhook", headers=VALID_HEADERS, content=VALID_BODY)
     
     assert response.status_code == 200
     assert response.json() == {"status": "ok"}
 
-def test_webhook_duplicate_message():
+def test_webhook_duplicate_message(client):
     """Test duplicate message handling (idempotent) - should still return 200"""
-    message = {
-        "message_id": "pytest_dup_test",
-        "from": "+919876543210",
-        "to": "+14155550100",
-        "ts": "2025-01-15T10:00:00Z",
-        "text": "Duplicate test"
-    }
-    signature, body = generate_signature(message)
-    
     # First insert
-    response1 = client.post(
-        "/webhook",
-        headers={
-            "Content-Type": "application/json",
-            "X-Signature": signature
-        },
-        data=body
-    )
+    response1 = client.post("/webhook", headers=DUP_HEADERS, content=DUP_BODY)
     assert response1.status_code == 200
     
     # Second insert (duplicate) - should still return 200 (idempotent)
-    response2 = client.post(
-        "/webhook",
-        headers={
-            "Content-Type": "application/json",
-            "X-Signature": signature
-        },
-        data=body
-    )
+    response2 = client.post("/webhook", headers=DUP_HEADERS, content=DUP_BODY)
     assert response2.status_code == 200
     assert response2.json() == {"status": "ok"}
 
-def test_webhook_invalid_signature():
+def test_webhook_invalid_signature(client):
     """Test invalid signature returns 401"""
-    message = {
-        "message_id": "pytest_invalid_sig",
-        "from": "+919876543210",
-        "to": "+14155550100",
-        "ts": "2025-01-15T10:00:00Z",
-        "text": "Invalid signature test"
-    }
-    body = json.dumps(message, separators=(',', ':'))
-    
-    response = client.post(
-        "/webhook",
-        headers={
-            "Content-Type": "application/json",
-            "X-Signature": "invalid_signature_12345"
-        },
-        data=body
-    )
+    response = client.post("/webhook", headers=INVALID_SIG_HEADERS, content=INVALID_SIG_BODY)
     
     assert response.status_code == 401
     assert "invalid signature" in response.json()["detail"]
 
-def test_webhook_missing_signature():
-    """Test missing signature header returns 401"""
-    message = {
-        "message_id": "pytest_no_sig",
-        "from": "+919876543210",
-        "to": "+14155550100",
-        "ts": "2025-01-15T10:00:00Z",
-        "text": "No signature"
-    }
-    body = json.dumps(message, separators=(',', ':'))
-    
-    response = client.post(
-        "/webhook",
-        headers={"Content-Type": "application/json"},
-        data=body
-    )
+def test_webhook_non_ascii_signature(client):
+    """Test a signature that is neither hex nor base64 ASCII returns 401"""
+    response = client.post("/webhook", headers=NON_ASCII_SIG_HEADERS, content=NON_ASCII_SIG_BODY)
     
     assert response.status_code == 401
+    assert "invalid signature" in response.json()["detail"]
 
-def test_webhook_invalid_e164_format():
-    """Test validation error for invalid E.164 phone format returns 422"""
-    message = {
-        "message_id": "pytest_invalid_phone",
-        "from": "919876543210",  # Missing + prefix
-        "to": "+14155550100",
-        "ts": "2025-01-15T10:00:00Z",
-        "text": "Bad phone format"
-    }
-    signature, body = generate_signature(message)
-    
-    response = client.post(
-        "/webhook",
-        headers={
-            "Content-Type": "application/json",
-            "X-Signature": signature
-        },
-        data=body
-    )
-    
-    assert response.status_code == 422
-
-def test_webhook_invalid_timestamp():
-    """Test validation error for invalid timestamp returns 422"""
-    message = {
-        "message_id": "pytest_invalid_ts",
-        "from": "+919876543210",
-        "to": "+14155550100",
-        "ts": "2025-01-15T10:00:00",  # Missing Z suffix
-        "text": "Bad timestamp"
-    }
-    signature, body = generate_signature(message)
-    
-    response = client.post(
-        "/webhook",
-        headers={
-            "Content-Type": "application/json",
-            "X-Signature": signature
-        },
-        data=body
-    )
+def test_webhook_missing_signature(client):
+    """Test missing signature header returns 401"""
+    response = client.post("/webhook", headers=NO_SIG_HEADERS, content=NO_SIG_BODY)
     
-    assert response.status_code == 422
+    assert response.status_code == 401
 
-def test_webhook_empty_message_id():
-    """Test validation error for empty message_id returns 422"""
-    message = {
-        "message_id": "",  # Empty message_id
-        "from": "+919876543210",
-        "to": "+14155550100",
-        "ts": "2025-01-15T10:00:00Z",
-        "text": "Empty message_id"
-    }
-    signature, body = generate_signature(message)
-    
-    response = client.post(
-        "/webhook",
-        headers={
-            "Content-Type": "application/json",
-            "X-Signature": signature
-        },
-        data=body
-    )
+@pytest.mark.parametrize("body,headers,error", INVALID_REQUESTS)
+def test_webhook_rejects_invalid(client, body, headers, error):
+    """Test validation errors (bad E.164, timestamp, empty message_id) return 422"""
+    response = client.post("/webhook", headers=headers, content=body)
     
     assert response.status_code == 422
+    assert error in response.json()["detail"]
 
-def test_webhook_optional_text():
+def test_webhook_optional_text(client):
     """Test that text field is optional"""
-    message = {
-        "message_id": "pytest_no_text",
-        "from": "+919876543210",
-        "to": "+14155550100",
-        "ts": "2025-01-15T10:00:00Z"
-        # No text field
-    }
-    signature, body = generate_signature(message)
-    
-    response = client.post(
-        "/webhook",
-        headers={
-            "Content-Type": "application/json",
-            "X-Signature": signature
-        },
-        data=body
-    )
+    response = client.post("/webhook", headers=NO_TEXT_HEADERS, content=NO_TEXT_BODY)
     
     assert response.status_code == 200
     assert response.json() == {"status": "ok"}
 
+def test_webhook_base64_signature(client):
+    """Test that a base64-encoded signature is accepted"""
+    response = client.post("/webhook", headers=B64_HEADERS, content=B64_BODY)
+    
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok"}